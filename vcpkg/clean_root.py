@@ -1,9 +1,9 @@
 from __future__ import annotations
 
-import shutil
 import sys
 
 from vcpkg_setup import VCPKG_ROOT_DIR
+from vcpkg_setup import remove_dir
 
 
 def delete_dir(dir_name: str) -> None:
@@ -16,7 +16,7 @@ def delete_dir(dir_name: str) -> None:
         return
 
     try:
-        shutil.rmtree(target_dir)
+        remove_dir(target_dir)
     except Exception as ex:
         print(f'error ({ex})')
         sys.exit(1)
@@ -4,21 +4,39 @@ import hashlib
 import json
 import os
 import re
-import shutil
+import subprocess
 import sys
-from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timedelta
+from itertools import repeat
 from pathlib import Path
-from typing import Any, NoReturn, Callable
+from typing import Any, NoReturn
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from vcpkg_setup import BASE_DIR, ASSET_CACHE_DIR, MANIFEST_DIR
-from vcpkg_setup import ensure_dir
+from vcpkg_setup import ensure_dir, remove_dir, remove_files
 from vcpkg_setup import print_operation_begin, print_operation_end
-from vcpkg_setup import run_shell_command, ShellCommandOutput
 
 SHORT_HASH_LEN = 15
 MANIFEST_HASH_ALG = 'sha1'
+HASH_CHUNK_SIZE = 1024 * 1024
+HASH_MAX_WORKERS = min(8, os.cpu_count() or 4)
+PARALLEL_HASH_MIN_FILES = 8
+
+_OUTPUT_ASSET_BASE_PATTERN = r'\S+/([0-9a-f]+)[^\S\n][^\n]*?authoritative source ([^\s,]+)'
+_ASSET_SUCCESS_RE = re.compile(f'using asset cache {_OUTPUT_ASSET_BASE_PATTERN}')
+_ASSET_MISSING_RE = re.compile(f"Couldn't open file {_OUTPUT_ASSET_BASE_PATTERN}")
+_ASSET_FILE_NAME_LEN = 128
+_INFO_FILE_RE = re.compile(r'_(.*)\.json')
+
+_FILE_HASH_MEMO: dict[tuple[str, int, int, str], str] = {}
+_INFO_DATA_MEMO: dict[tuple[str, int, int], dict] = {}
+_MANIFEST_FILES_MEMO: dict[tuple[str, int], list[Path]] = {}
 
 
 class AssetsInfo:
@@ -52,10 +70,23 @@ class AssetsInfo:
             else:
                 raise FileNotFoundError(f'asset info file "{file}" not found')
 
-        with file.open() as f:
-            return json.load(f)
+        file_stat = file.stat()
+        memo_key = (str(file), file_stat.st_mtime_ns, file_stat.st_size)
+        if memo_key not in _INFO_DATA_MEMO:
+            data = file.read_bytes()
+            _INFO_DATA_MEMO[memo_key] = orjson.loads(data) if orjson else json.loads(data)
+
+        # info data holds strings and flat dicts, so copying one level deep isolates the memo
+        return {
+            key: value.copy() if isinstance(value, dict) else value
+            for key, value in _INFO_DATA_MEMO[memo_key].items()
+            }
 
     def save(self, file: Path) -> None:
+        if orjson:
+            file.write_bytes(orjson.dumps(self.__dict__, option=orjson.OPT_INDENT_2))
+            return
+
         with file.open(mode='w') as f:
             json.dump(self.__dict__, f, indent=2)
 
@@ -66,9 +97,6 @@ class AssetsInfo:
 class AssetDownloader:
     _CONSOLE_ENCODING = 'cp866'
     _TEMP_DIR = BASE_DIR / '_temp'
-    _OUTPUT_ASSET_BASE_PATTERN = r'\S+/([0-9a-f]+)\s.*?authoritative source ([^\s,]+)'
-    _OUTPUT_ASSET_SUCCESS_PATTERN = f'using asset cache {_OUTPUT_ASSET_BASE_PATTERN}'
-    _OUTPUT_ASSET_MISSING_PATTERN = f"Couldn't open file {_OUTPUT_ASSET_BASE_PATTERN}"
 
     class AssetDownloadError(Exception):
         pass
@@ -99,7 +127,7 @@ class AssetDownloader:
 
     def _cleanup(self) -> None:
         if self._work_dir.is_dir():
-            shutil.rmtree(self._work_dir)
+            remove_dir(self._work_dir)
         self._assets_info_file.unlink(missing_ok=True)
 
     def _ensure_dirs(self) -> None:
@@ -109,7 +137,8 @@ class AssetDownloader:
         ensure_dir(self._binary_cache_dir)
 
     def _copy_manifest_file(self) -> None:
-        shutil.copy(self._manifest_file, self._work_dir / 'vcpkg.json')
+        work_manifest_file = self._work_dir / 'vcpkg.json'
+        work_manifest_file.write_bytes(self._manifest_file.read_bytes())
 
     def _init_assets_info(self) -> None:
         self._assets_info.manifest_hash = calc_file_hash(
@@ -118,61 +147,61 @@ class AssetDownloader:
                 )
 
     def download(self) -> timedelta:
-        output_text, exit_code, elapsed_time = self._run_vcpkg_install()
-        self._write_log(output_text)
-
-        downloaded_assets_info = self._extract_downloaded_assets_info(output_text)
-        self._assets_info.update_info(downloaded_assets_info)
+        exit_code, missed_asset_info, elapsed_time = self._run_vcpkg_install()
 
         if exit_code:
-            self._handle_download_error(output_text)
+            self._handle_download_error(missed_asset_info)
 
         self._assets_info.save(self._assets_info_file)
         return elapsed_time
 
-    def _run_vcpkg_install(self) -> tuple[str, int, timedelta]:
+    def _run_vcpkg_install(self) -> tuple[int, tuple[str, str] | None, timedelta]:
+        missed_asset_info = None
+
+        start_time = datetime.now()
+        with self._start_vcpkg_install() as process, \
+                self._log_file.open(mode='w', encoding='utf-8') as log:
+            for output_line in process.stdout:
+                output_line = output_line.decode(encoding=self._CONSOLE_ENCODING)
+                log.write(output_line)
+
+                downloaded_assets_info = self._extract_downloaded_assets_info(output_line)
+                self._assets_info.update_info(downloaded_assets_info)
+
+                if not missed_asset_info:
+                    missed_asset_info = self._extract_missed_asset_info(output_line)
+        elapsed_time = datetime.now() - start_time
+
+        return process.returncode, missed_asset_info, elapsed_time
+
+    def _start_vcpkg_install(self) -> subprocess.Popen:
         env = os.environ
         env['VCPKG_DOWNLOADS'] = str(self._downloads_dir)
         env['VCPKG_DEFAULT_BINARY_CACHE'] = str(self._binary_cache_dir)
         env['VCPKG_KEEP_ENV_VARS'] = 'PATH'
 
-        start_time = datetime.now()
-        process_res = run_shell_command(
-                command='vcpkg install --clean-after-build',
+        return subprocess.Popen(
+                'vcpkg install --clean-after-build',
+                shell=True,
                 cwd=self._work_dir,
                 env=env,
-                check=False,
-                output=ShellCommandOutput.CAPTURE_COMBINED,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
                 )
-        elapsed_time = datetime.now() - start_time
-        output_text = process_res.stdout.decode(encoding=self._CONSOLE_ENCODING)
-
-        return output_text, process_res.returncode, elapsed_time
-
-    def _write_log(self, output_text: str) -> None:
-        self._log_file.write_text(output_text, encoding='utf-8')
-
-    def _extract_downloaded_assets_info(self, output_text: str) -> dict[str, str]:
-        downloaded_info = {}
-
-        matches = re.finditer(self._OUTPUT_ASSET_SUCCESS_PATTERN, output_text)
-        for match in matches:
-            sha512, url = match.groups()
-            downloaded_info[sha512] = url
 
-        return downloaded_info
+    def _extract_downloaded_assets_info(self, output_line: str) -> dict[str, str]:
+        return dict(_ASSET_SUCCESS_RE.findall(output_line))
 
-    def _extract_missed_asset_info(self, output_text: str) -> tuple[str, str] | None:
-        match = re.search(self._OUTPUT_ASSET_MISSING_PATTERN, output_text)
+    def _extract_missed_asset_info(self, output_line: str) -> tuple[str, str] | None:
+        match = _ASSET_MISSING_RE.search(output_line)
         if not match:
             return None
         sha512, url = match.groups()
         return sha512, url
 
-    def _handle_download_error(self, output_text: str) -> NoReturn:
-        messed_asset_info = self._extract_missed_asset_info(output_text)
-        if messed_asset_info:
-            sha512, url = messed_asset_info
+    def _handle_download_error(self, missed_asset_info: tuple[str, str] | None) -> NoReturn:
+        if missed_asset_info:
+            sha512, url = missed_asset_info
             raise self.MissingAssetError(sha512, url)
         else:
             raise self.AssetDownloadError
@@ -198,9 +227,15 @@ def select_manifests() -> list[Path]:
 
 
 def get_manifest_files() -> list[Path]:
-    files = MANIFEST_DIR.glob('*.json')
-    files = [file for file in files if file.is_file()]
-    return files
+    memo_key = (str(MANIFEST_DIR), MANIFEST_DIR.stat().st_mtime_ns)
+    if memo_key not in _MANIFEST_FILES_MEMO:
+        with os.scandir(MANIFEST_DIR) as entries:
+            _MANIFEST_FILES_MEMO[memo_key] = [
+                Path(entry.path)
+                for entry in entries
+                if os.path.normcase(entry.name).endswith('.json') and entry.is_file()
+                ]
+    return _MANIFEST_FILES_MEMO[memo_key].copy()
 
 
 def download_manifest_assets(manifest: Path) -> None:
@@ -234,19 +269,21 @@ def user_wants_to_repeat() -> bool:
 
 @dataclass
 class AssetsState:
-    asset_files: list[Path]
-    good_asset_files: list[Path]
-    missing_asset_files: list[Path]
-    extra_asset_files: list[Path]
+    # names of the files in ASSET_CACHE_DIR
+    asset_files: list[str]
+    good_asset_files: list[str]
+    missing_asset_files: list[str]
+    extra_asset_files: list[str]
 
-    info_files: list[Path]
-    good_info_files: list[Path]
-    outdated_info_files: list[Path]
-    missing_info_files: list[Path]
-    extra_info_files: list[Path]
+    info_files: list[str]
+    good_info_files: list[str]
+    outdated_info_files: list[str]
+    missing_info_files: list[str]
+    extra_info_files: list[str]
 
-    other_files: list[Path]
+    other_files: list[str]
 
+    project_names: dict[str, str]
     good_assets_info: AssetsInfo
 
     @staticmethod
@@ -259,12 +296,18 @@ class AssetsState:
             error_message = f'error (manifest dir "{MANIFEST_DIR.name}" not found)'
             sys.exit(error_message)
 
-        asset_files, info_files, other_files = AssetsState._get_asset_cache_dir_files()
+        manifest_files = get_manifest_files()
+        asset_files, info_files, other_files, project_names = \
+            AssetsState._get_asset_cache_dir_files()
 
-        good_info_files, outdated_info_files, missing_info_files, extra_info_files = \
-            AssetsState._categorize_info_files(info_files)
+        good_info_files, outdated_info_files, missing_info_projects, extra_info_files = \
+            AssetsState._categorize_info_files(info_files, manifest_files)
+        missing_info_files = list(missing_info_projects)
+        project_names |= missing_info_projects
 
-        good_assets_info = AssetsInfo.load_from_files(good_info_files)
+        good_assets_info = AssetsInfo.load_from_files(
+                [ASSET_CACHE_DIR / info_file for info_file in good_info_files],
+                )
         good_asset_files, missing_asset_files, extra_asset_files = \
             AssetsState._categorize_asset_files(asset_files, good_assets_info)
 
@@ -279,88 +322,109 @@ class AssetsState:
                 missing_info_files=missing_info_files,
                 extra_info_files=extra_info_files,
                 other_files=other_files,
+                project_names=project_names,
                 good_assets_info=good_assets_info,
                 )
 
     @staticmethod
-    def _get_asset_cache_dir_files() -> tuple[list[Path], list[Path], list[Path]]:
-        files = ASSET_CACHE_DIR.glob('*')
-        files = [file for file in files if file.is_file()]
-
-        asset_files, files = partition_by_predicate(files, AssetsState._is_asset_file)
-        info_files, files = partition_by_predicate(files, AssetsState._is_info_file)
-
-        return asset_files, info_files, files
-
-    @staticmethod
-    def _is_asset_file(file: Path) -> bool:
-        return bool(re.fullmatch(r'[0-9a-f]{128}', file.name))
-
-    @staticmethod
-    def _is_info_file(file: Path) -> bool:
-        return bool(AssetsState._get_project_name_from_info_file(file))
+    def _get_asset_cache_dir_files() -> tuple[list[str], list[str], list[str], dict[str, str]]:
+        asset_files = []
+        info_files = []
+        other_files = []
+        project_names = {}
+
+        with os.scandir(ASSET_CACHE_DIR) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+
+                if AssetsState._is_asset_file(entry.name):
+                    asset_files.append(entry.name)
+                elif match := _INFO_FILE_RE.fullmatch(entry.name):
+                    info_files.append(entry.name)
+                    project_names[entry.name] = match[1]
+                else:
+                    other_files.append(entry.name)
+
+        return asset_files, info_files, other_files, project_names
 
     @staticmethod
-    def _get_project_name_from_info_file(file: Path) -> str | None:
-        match = re.fullmatch(r'_(.*)\.json', file.name)
-        return match[1] if match else None
+    def _is_asset_file(file: str) -> bool:
+        if len(file) != _ASSET_FILE_NAME_LEN or file.lower() != file:
+            return False
+        try:
+            # fromhex() skips whitespace, so require a full-length result
+            return len(bytes.fromhex(file)) == _ASSET_FILE_NAME_LEN // 2
+        except ValueError:
+            return False
 
     @staticmethod
     def _categorize_info_files(
-            info_files: list[Path],
-            ) -> tuple[list[Path], list[Path], list[Path], list[Path]]:
-        manifest_files = get_manifest_files()
-        rest_info_files = info_files.copy()
-
+            info_files: list[str],
+            manifest_files: list[Path],
+            ) -> tuple[list[str], list[str], dict[str, str], list[str]]:
         good_info_files = []
         outdated_info_files = []
-        missing_info_files = []
+        missing_info_projects = {}
+
+        checked_manifests = []
+        checked_info_files = []
+        checked_infos = []
+
+        existing_info_files = {os.path.normcase(file): file for file in info_files}
 
         for manifest in manifest_files:
             project_name = manifest.stem
-            info_file = ASSET_CACHE_DIR / f'_{project_name}.json'
+            info_file = f'_{project_name}.json'
 
-            if not info_file.is_file():
-                missing_info_files.append(info_file)
+            if os.path.normcase(info_file) not in existing_info_files:
+                missing_info_projects[info_file] = project_name
                 continue
 
-            actual_manifest_hash = calc_file_hash(manifest, MANIFEST_HASH_ALG)
-            expected_manifest_hash = AssetsInfo.load_from_file(info_file).manifest_hash
+            info_file = existing_info_files[os.path.normcase(info_file)]
+
+            checked_manifests.append(manifest)
+            checked_info_files.append(info_file)
+            checked_infos.append(AssetsInfo.load_from_file(ASSET_CACHE_DIR / info_file))
+
+        actual_manifest_hashes = calc_files_hashes(checked_manifests, MANIFEST_HASH_ALG)
 
-            if actual_manifest_hash == expected_manifest_hash:
+        for info_file, info, actual_manifest_hash in \
+                zip(checked_info_files, checked_infos, actual_manifest_hashes):
+            if actual_manifest_hash == info.manifest_hash:
                 good_info_files.append(info_file)
             else:
                 outdated_info_files.append(info_file)
 
-            rest_info_files.remove(info_file)
+        known_info_files = {*good_info_files, *outdated_info_files}
+        rest_info_files = [file for file in info_files if file not in known_info_files]
 
-        return good_info_files, outdated_info_files, missing_info_files, rest_info_files
+        return good_info_files, outdated_info_files, missing_info_projects, rest_info_files
 
     @staticmethod
     def _categorize_asset_files(
-            asset_files: list[Path],
+            asset_files: list[str],
             assets_info: AssetsInfo,
-            ) -> tuple[list[Path], list[Path], list[Path]]:
-        rest_asset_files = asset_files.copy()
-
+            ) -> tuple[list[str], list[str], list[str]]:
         good_asset_files = []
         missing_asset_files = []
 
-        for asset_hash in assets_info.assets:
-            asset_file = ASSET_CACHE_DIR / asset_hash
+        existing_asset_files = set(asset_files)
 
-            if not asset_file.is_file():
+        for asset_file in assets_info.assets:
+            if asset_file not in existing_asset_files:
                 missing_asset_files.append(asset_file)
                 continue
 
             good_asset_files.append(asset_file)
-            rest_asset_files.remove(asset_file)
+
+        rest_asset_files = [file for file in asset_files if file not in assets_info.assets]
 
         return good_asset_files, missing_asset_files, rest_asset_files
 
     def print_items(
             self,
-            items: list[Path],
+            items: list[str],
             desc: str,
             *,
             transform_asset_files: bool = True,
@@ -371,19 +435,19 @@ class AssetsState:
 
         print(f'{desc} ({len(items)}):')
 
-        for path in items:
-            if AssetsState._is_asset_file(path) and transform_asset_files:
-                short_hash = path.name[:SHORT_HASH_LEN] + '...'
-                url = self.good_assets_info.assets.get(path.name, None)
+        for file in items:
+            if AssetsState._is_asset_file(file) and transform_asset_files:
+                short_hash = file[:SHORT_HASH_LEN] + '...'
+                url = self.good_assets_info.assets.get(file, None)
 
                 output = short_hash
                 output += f' ({url})' if url else ''
 
-            elif AssetsState._is_info_file(path) and transform_info_files:
-                output = self._get_project_name_from_info_file(path)
+            elif file in self.project_names and transform_info_files:
+                output = self.project_names[file]
 
             else:
-                output = path.name
+                output = file
 
             print('  *', output)
 
@@ -447,36 +511,35 @@ def cleanup_assets() -> None:
     if not files_to_delete:
         stop('No files to delete')
 
-    for file in files_to_delete:
-        file.unlink()
+    remove_files([ASSET_CACHE_DIR / file for file in files_to_delete])
     state.print_items(files_to_delete, 'Deleted files', transform_info_files=False)
 
 
 def calc_file_hash(file: Path, algorithm: str = 'sha1') -> str:
+    file_stat = file.stat()
+    memo_key = (str(file), file_stat.st_mtime_ns, file_stat.st_size, algorithm)
+    if memo_key in _FILE_HASH_MEMO:
+        return _FILE_HASH_MEMO[memo_key]
+
     h = hashlib.new(algorithm)
 
     with file.open(mode='rb') as f:
         while True:
-            chunk = f.read(h.block_size)
+            chunk = f.read(HASH_CHUNK_SIZE)
             if not chunk:
                 break
             h.update(chunk)
 
-    return h.hexdigest()
+    _FILE_HASH_MEMO[memo_key] = h.hexdigest()
+    return _FILE_HASH_MEMO[memo_key]
 
 
-def partition_by_predicate(
-        iterable: Iterable[Any],
-        predicate: Callable[[Any], bool],
-        ) -> tuple[list[Any], list[Any]]:
-    true_items = []
-    false_items = []
-    for item in iterable:
-        if predicate(item):
-            true_items.append(item)
-        else:
-            false_items.append(item)
-    return true_items, false_items
+def calc_files_hashes(files: list[Path], algorithm: str = 'sha1') -> list[str]:
+    if len(files) < PARALLEL_HASH_MIN_FILES:
+        return [calc_file_hash(file, algorithm) for file in files]
+
+    with ThreadPoolExecutor(max_workers=HASH_MAX_WORKERS) as executor:
+        return list(executor.map(calc_file_hash, files, repeat(algorithm)))
 
 
 def get_user_selection(
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import os
+import shutil
 import subprocess
 import winreg as reg
 from collections.abc import Mapping
@@ -12,6 +14,9 @@ ASSET_CACHE_DIR = BASE_DIR / 'asset_cache'
 BINARY_CACHE_DIR = BASE_DIR / 'binary_cache'
 MANIFEST_DIR = BASE_DIR / 'manifests'
 
+NATIVE_REMOVE_MIN_FILES = 32
+COMMAND_LINE_MAX_LEN = 7900
+
 
 class ShellCommandOutput(Enum):
     DEFAULT = auto()
@@ -82,6 +87,80 @@ def ensure_dir(path: Path) -> None:
     path.mkdir(parents=True, exist_ok=True)
 
 
+def remove_dir(path: Path) -> None:
+    if os.name == 'nt' and is_cmd_safe_path(path):
+        run_shell_command(f'rmdir /s /q "{path}"')
+    elif os.name != 'nt' and shutil.which('rm'):
+        subprocess.run(
+                ['rm', '-rf', '--', str(path)],
+                check=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                )
+    else:
+        shutil.rmtree(path)
+
+    if path.exists():
+        raise OSError(f'cannot remove dir "{path}"')
+
+
+def is_cmd_safe_path(path: Path) -> bool:
+    # cmd expands %VAR% (and !VAR! with delayed expansion) even inside quotes
+    return not any(char in str(path) for char in '%!')
+
+
+def remove_files(paths: list[Path]) -> None:
+    if os.name == 'nt':
+        batch_paths = [path for path in paths if is_cmd_safe_path(path)]
+    elif shutil.which('rm'):
+        batch_paths = paths
+    else:
+        batch_paths = []
+
+    if len(batch_paths) < NATIVE_REMOVE_MIN_FILES:
+        batch_paths = []
+
+    batch_path_set = set(batch_paths)
+    for path in paths:
+        if path not in batch_path_set:
+            path.unlink()
+
+    for batch in split_paths(batch_paths, COMMAND_LINE_MAX_LEN):
+        if os.name == 'nt':
+            run_shell_command('del /f /q ' + ' '.join(f'"{path}"' for path in batch))
+        else:
+            subprocess.run(
+                    ['rm', '-f', '--', *map(str, batch)],
+                    check=True,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    )
+
+    remaining_paths = [path for path in batch_paths if path.exists()]
+    if remaining_paths:
+        raise OSError(f'cannot remove files ({len(remaining_paths)} left)')
+
+
+def split_paths(paths: list[Path], max_len: int) -> list[list[Path]]:
+    batches = []
+    batch = []
+    batch_len = 0
+
+    for path in paths:
+        path_len = len(str(path)) + 3  # quotes and separator
+        if batch and batch_len + path_len > max_len:
+            batches.append(batch)
+            batch = []
+            batch_len = 0
+        batch.append(path)
+        batch_len += path_len
+
+    if batch:
+        batches.append(batch)
+
+    return batches
+
+
 def print_operation_begin(message: str) -> None:
     print(f'{message}... ', end='', flush=True)
 